@@ -2,18 +2,93 @@
     Wiki core
     ~~~~~~~~~
 """
+from collections import defaultdict
 from collections import OrderedDict
+from functools import lru_cache
 from io import open
+import mmap
 import os
 import re
+import tempfile
+import threading
 
 from flask import abort
+from flask import g
+from flask import has_request_context
+from flask import request
 from flask import url_for
 
 import markdown
 import json
 import datetime
 
+# re2 is optional, when installed user supplied search terms are matched
+# in linear time and can not backtrack catastrophically
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# orjson is optional, when installed history files are serialized by it
+# instead of the much slower pure python json encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_WIKILINK_RE = re.compile(
+    r"((?<!\<code\>)\[\[([^<].+?) \s*([|] \s* (.+?) \s*)?]])",
+    re.X | re.U
+)
+_MULTISPACE_RE = re.compile('[ ]{2,}')
+_H1_RE = re.compile(r"<h1>(.*?)</h1>", re.S)
+_META_RE = re.compile(r'^[ ]{0,3}([A-Za-z0-9_-]+):\s*(.*)')
+_META_MORE_RE = re.compile(r'^[ ]{4,}')
+_META_BEGIN_RE = re.compile(r'^-{3}(\s.*)?')
+_META_END_RE = re.compile(r'^(-{3}|\.{3})(\s.*)?')
+_TAG_SPLIT_RE = re.compile(r'\s*,\s*')
+_URL_TRANS = str.maketrans({' ': '_', '\\': '/'})
+# files larger than this are decoded straight from a memory map
+_MMAP_THRESHOLD = 256 * 1024
+# rendered pages are cached on disk next to the page, with this suffix
+RENDER_CACHE_SUFFIX = '.htmlc'
+# bump this whenever the rendered output changes, so pages cached by
+# an older version are rendered again
+RENDER_CACHE_VERSION = 2
+# markdown instances are expensive to set up, so every thread keeps
+# its own and resets it between documents
+_MD_LOCAL = threading.local()
+# a new wiki is set up for every request, so the last index of every
+# content directory is kept here, along with the stats of its pages
+_INDEX_CACHE = {}
+
+
+def read_file(path):
+    """
+        Reads and decodes a utf-8 file in one go, without going through
+        the buffered text io layers. Line endings are normalized to
+        "\\n" the same way a file opened in text mode would.
+
+        :param str path: the path of the file to read
+
+        :returns: the content of the file
+        :rtype: str
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        size = os.fstat(fd).st_size
+        if size > _MMAP_THRESHOLD:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as data:
+                content = str(data, 'utf-8')
+        else:
+            content = os.read(fd, size).decode('utf-8')
+    finally:
+        os.close(fd)
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
 
 def clean_url(url):
     """
@@ -28,10 +103,124 @@ def clean_url(url):
         :returns: the cleaned url
         :rtype: str
     """
-    url = re.sub('[ ]{2,}', ' ', url).strip()
-    url = url.lower().replace(' ', '_')
-    url = url.replace('\\\\', '/').replace('\\', '/')
-    return url
+    url = _MULTISPACE_RE.sub(' ', url).strip().lower()
+    # a doubled (escaped) backslash maps to a single folder separator
+    url = url.replace('\\\\', '\\')
+    return url.translate(_URL_TRANS)
+
+
+def get_markdown():
+    """
+        Returns the markdown instance of the current thread, reset so
+        it is ready to convert a new document.
+
+        :returns: the markdown instance
+        :rtype: markdown.Markdown
+    """
+    md = getattr(_MD_LOCAL, 'md', None)
+    if md is None:
+        md = _MD_LOCAL.md = markdown.Markdown([
+            'codehilite',
+            'fenced_code',
+            'meta',
+            'tables'
+        ])
+    md.reset()
+    return md
+
+
+def read_header(path):
+    """
+        Reads only the meta block at the top of a page, up to and
+        including the blank line that separates it from the content.
+
+        :param str path: the path of the page to read
+
+        :returns: the meta block of the page
+        :rtype: str
+    """
+    lines = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            lines.append(line)
+            if line == '\n':
+                break
+    return ''.join(lines)
+
+
+def parse_meta(meta_raw):
+    """
+        Parses a meta block into a dictionary the same way the markdown
+        meta extension does. Keys are lowercased and every key holds
+        the list of its lines, indented lines continue the previous key.
+        The block may be fenced like a YAML header, and ends at the
+        first blank line.
+
+        :param str meta_raw: the meta block to parse
+
+        :returns: the parsed metadata
+        :rtype: dict
+    """
+    meta = {}
+    key = None
+    # markdown expands tabs before the meta extension sees the lines
+    lines = meta_raw.expandtabs(4).split('\n')
+    if _META_BEGIN_RE.match(lines[0]):
+        lines = lines[1:]
+    for line in lines:
+        if line.strip() == '' or _META_END_RE.match(line):
+            break
+        match = _META_RE.match(line)
+        if match:
+            key = match.group(1).lower()
+            meta.setdefault(key, []).append(match.group(2).strip())
+        elif key is not None and _META_MORE_RE.match(line):
+            meta[key].append(line.strip())
+        else:
+            break
+    return meta
+
+
+def compile_search(term, ignore_case=True):
+    """
+        Compiles a user supplied search term. Uses re2 if it is
+        installed and falls back to :mod:`re` if it is not, or if the
+        term uses syntax re2 does not support (e.g. backreferences).
+
+        :param str term: the regular expression to compile
+        :param bool ignore_case: whether the search is case insensitive
+
+        :returns: the compiled pattern
+    """
+    if re2 is not None:
+        try:
+            return re2.compile(('(?i)' if ignore_case else '') + term)
+        except re2.error:
+            pass
+    return re.compile(term, re.IGNORECASE if ignore_case else 0)
+
+
+def cached_url_for(endpoint, url):
+    """
+        Builds the url for a page with :func:`flask.url_for`, caching
+        the result for the rest of the request. Pages tend to link to
+        the same pages over and over, and building a url means going
+        through the url map every time.
+
+        :param str endpoint: the endpoint to build the url for
+        :param str url: the url of the page
+
+        :returns: the built url
+        :rtype: str
+    """
+    urls = getattr(g, '_wikilink_urls', None)
+    if urls is None:
+        urls = g._wikilink_urls = {}
+    try:
+        return urls[endpoint, url]
+    except KeyError:
+        built = urls[endpoint, url] = url_for(endpoint, url=url)
+        return built
 
 
 def wikilink(text, url_formatter=None):
@@ -42,7 +231,8 @@ def wikilink(text, url_formatter=None):
 
         :param str text: the html to highlight wiki links in.
         :param function url_formatter: which URL formatter to use,
-            will by default use the flask url formatter
+            will by default use the flask url formatter, cached per
+            request
 
         Syntax:
             This accepts Wikilink syntax in the form of [[WikiLink]] or
@@ -53,21 +243,22 @@ def wikilink(text, url_formatter=None):
         :returns: the processed html
         :rtype: str
     """
+    # most pages contain no wiki links, a plain substring check is
+    # much cheaper than running the regex over the whole document
+    if '[[' not in text:
+        return text
     if url_formatter is None:
-        url_formatter = url_for
-    link_regex = re.compile(
-        r"((?<!\<code\>)\[\[([^<].+?) \s*([|] \s* (.+?) \s*)?]])",
-        re.X | re.U
-    )
-    for i in link_regex.findall(text):
-        title = [i[-1] if i[-1] else i[1]][0]
-        url = clean_url(i[1])
-        html_url = "<a href='{0}'>{1}</a>".format(
+        url_formatter = cached_url_for
+
+    def _repl(match):
+        title = match.group(4) or match.group(2)
+        url = clean_url(match.group(2))
+        return "<a href='{0}'>{1}</a>".format(
             url_formatter('wiki.display', url=url),
             title
         )
-        text = re.sub(link_regex, html_url, text, count=1)
-    return text
+
+    return _WIKILINK_RE.sub(_repl, text)
 
 
 class Processor(object):
@@ -82,21 +273,19 @@ class Processor(object):
     preprocessors = []
     postprocessors = [wikilink]
 
-    def __init__(self, text):
+    def __init__(self, text, meta_only=False):
         """
             Initialization of the processor.
 
             :param str text: the text to process
+            :param bool meta_only: only set up what is needed to
+                process the metadata, see :meth:`process_meta_only`
         """
-        self.md = markdown.Markdown([
-            'codehilite',
-            'fenced_code',
-            'meta',
-            'tables'
-        ])
+        self.md = None if meta_only else get_markdown()
         self.input = text
         self.markdown = None
         self.meta_raw = None
+        self.meta_lines = None
 
         self.pre = None
         self.html = None
@@ -117,12 +306,14 @@ class Processor(object):
             Convert to HTML.
         """
         self.html = self.md.convert(self.pre)
+        self.meta_lines = self.md.Meta
 
     def split_raw(self):
         """
             Split text into raw meta and content.
         """
-        self.meta_raw, self.markdown = self.pre.split('\n\n', 1)
+        # a page without a blank line is all meta and has no body
+        self.meta_raw, _, self.markdown = self.pre.partition('\n\n')
 
     def process_meta(self):
         """
@@ -131,40 +322,33 @@ class Processor(object):
             .. warning:: Can only be called after :meth:`html` was
                 called.
         """
-        # the markdown meta plugin does not retain the order of the
-        # entries, so we have to loop over the meta values a second
-        # time to put them into a dictionary in the correct order
-        self.meta = OrderedDict()
-        rate_Num = 0
-        times_rated = 1
-        rated = 0
-        metaField = self.meta_raw.split('\n')
-        for line in metaField:
-            key = line.split(':', 1)[0]
-            rate = line.split()
-            if key == 'total':
-                rate_Num = int(rate[1])
-            elif key == 'timesrated':
-                times_rated = int(rate[1]) + 1
-            elif key == 'rating':
-                rated = int(rate[1])
-
-        total = rated + rate_Num
-        rated = str(total / times_rated)
-
-        for line in metaField:
-            key = line.split(':', 1)[0]
-            if key == 'total':
-                self.md.Meta[key.lower()] = str(total).lower()
-            elif key == 'timesrated':
-                self.md.Meta[key.lower()] = str(times_rated).lower()
-            elif key == 'rating':
-                self.md.Meta[key.lower()] = str(rated).lower()
-
-
-            # markdown metadata always returns a list of lines, we will
-            # reverse that here
-            self.meta[key.lower()] = '\n'.join(self.md.Meta[key.lower()])
+        # the rating entries are counters, entries that don't hold a
+        # number are left as they are
+        counts = {}
+        for key in ('total', 'timesrated', 'rating'):
+            try:
+                counts[key] = int(self.meta_lines[key][0])
+            except (KeyError, IndexError, ValueError):
+                pass
+
+        total = counts.get('rating', 0) + counts.get('total', 0)
+        times_rated = counts.get('timesrated', 0) + 1
+        # ratings are read back as integers, so keep the average whole
+        rated = total // times_rated
+
+        # only the rating entries the page already has are updated
+        if 'total' in counts:
+            self.meta_lines['total'] = [str(total)]
+        if 'timesrated' in counts:
+            self.meta_lines['timesrated'] = [str(times_rated)]
+        if 'rating' in counts:
+            self.meta_lines['rating'] = [str(rated)]
+
+        # the meta values keep the order of the entries in the page.
+        # markdown metadata always returns a list of lines, we will
+        # reverse that here
+        self.meta = OrderedDict(
+            (key, '\n'.join(lines)) for key, lines in self.meta_lines.items())
 
     def process_post(self):
         """
@@ -179,53 +363,42 @@ class Processor(object):
         """
             Generates a table of contents for any page that uses level 1 headers
         """
-        # Checks to see if there are any level 1 headers, after the markdown is converted
-        if final.count("<h1>"):
-            # Creates the necessary opening tags for our table of contents
-            table_html = \
-                "<div class=\"row\"><div class=\"span2\"><h3>Contents</h3><ul class='nav nav-tabs nav-stacked'>"
-
-            # gets arrays of all indicies in the file of the opening and closing h1 tags
-            header_open_loc = self.find_tags("<h1>", self.final)
-            header_close_loc = self.find_tags("</h1>", self.final)
-
-            # using the locations of the headers in the file, we can construct a table of contents
-            # after grabbing the name of a header, we add it to the table of contents as a list item
-            # we also add an anchor tag linked to the header further down on the page
-            for i in range(len(header_open_loc)):
-                header = final[header_open_loc[i] + 4:header_close_loc[i]]
-                header_f = header.lower()
-                header_f = header.replace(" ", "_")
-                header_f = "#" + header_f
-                table_html += "<li><a href=\"" + header_f + "\">" + header + "</a></li>"
-
-            # This is where we generate the anchor tags for the headers to be linked to by the table of contents
-            # It must be iterated backwards to not displace the html tags in reference to the indicies we already have
-            for i in range(len(header_open_loc)-1,-1, -1):
-                header = final[header_open_loc[i] + 4:header_close_loc[i]]
-                header_f = header.lower()
-                header_f = header.replace(" ", "_")
-                final = final[:header_open_loc[i]] + "<a name=\"" + header_f + "\"></a>" + \
-                    final[header_open_loc[i]:]
+        # Creates the necessary opening tags for our table of contents
+        table_parts = [
+            "<div class=\"row\"><div class=\"span2\"><h3>Contents</h3><ul class='nav nav-tabs nav-stacked'>"
+        ]
+        final_parts = []
+        last = 0
+
+        # in a single pass over the level 1 headers, after the markdown is converted, we add every header to the
+        # table of contents as a list item, and generate the anchor tag in front of the header for it to link to.
+        # The html is collected in pieces and joined once at the end rather than rebuilding the string per header
+        for match in _H1_RE.finditer(final):
+            header = match.group(1)
+            anchor = self.header_anchor(header)
+            table_parts.append("<li><a href=\"#" + anchor + "\">" + header + "</a></li>")
+            final_parts.append(final[last:match.start()])
+            final_parts.append("<a name=\"" + anchor + "\"></a>")
+            last = match.start()
+
+        # pages without any level 1 headers don't get a table of contents
+        if final_parts:
+            final_parts.append(final[last:])
 
             # close all of the opening tags created at the beginning of this method
             # this completes all of the html that we need for the table of contents
-            table_html += "</ul><br></div></div>"
+            table_parts.append("</ul><br></div></div>")
 
             # add the table of contents to the final html conversion of the markdown for the page
-            final = table_html + final
+            final = "".join(table_parts) + "".join(final_parts)
 
         return final
 
-    def find_tags(self, substr, given_string):
+    def header_anchor(self, header):
         """
-            Looks for all occurrences of a substring in a given string and returns a list of the beginning index
-            of all occurrences
+            Builds the anchor name used to link to a header from the table of contents
         """
-        matches = re.finditer(substr, given_string)
-        matches_positions = [match.start() for match in matches]
-
-        return matches_positions
+        return header.lower().replace(" ", "_")
 
     def process(self):
         """
@@ -243,47 +416,165 @@ class Processor(object):
 
         return self.final, self.markdown, self.meta
 
+    def process_meta_only(self):
+        """
+            Runs only the processing needed to get the metadata and
+            the raw markdown body. The meta block is parsed by
+            :func:`parse_meta`, no markdown or html is rendered. The
+            text may consist of the meta block only.
+        """
+        self.process_pre()
+        self.meta_raw, _, self.markdown = self.pre.partition('\n\n')
+        self.meta_lines = parse_meta(self.meta_raw)
+        self.process_meta()
+
+        return self.markdown, self.meta
+
+
+@lru_cache(maxsize=512)
+def render_file(path, mtime_ns, size, script_root):
+    """
+        Renders the page at the given path. The result is cached in
+        memory and in a file next to the page, both keyed on the
+        modification time and size of the page and on the root the wiki
+        is served from, which the links in the page are built with. A
+        page is only processed again after it changed. The cache does
+        not know about the processors, it may only be used while the
+        default ones are in use, see :meth:`Page.render`.
+
+        :param str path: the path of the page to render
+        :param int mtime_ns: the modification time of the page in
+            nanoseconds
+        :param int size: the size of the page in bytes
+        :param str script_root: the root of the current request
+
+        :returns: the html, markdown body and metadata of the page
+        :rtype: tuple
+    """
+    key = [RENDER_CACHE_VERSION, mtime_ns, size, script_root]
+    cache_path = path + RENDER_CACHE_SUFFIX
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            return cached['html'], cached['body'], OrderedDict(cached['meta'])
+    except (IOError, ValueError, KeyError, TypeError):
+        pass
+
+    html, body, meta = Processor(read_file(path)).process()
+    # write to a temporary file of our own first, so a concurrent reader
+    # or writer never sees a half written cache
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + '.', suffix=RENDER_CACHE_SUFFIX,
+            dir=os.path.dirname(cache_path))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # the metadata is stored as pairs to keep its order
+            json.dump({'key': key, 'html': html, 'body': body,
+                       'meta': list(meta.items())}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except IOError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return html, body, meta
+
+
+def remove_render_cache(path):
+    """
+        Removes the cached rendering of the page at the given path.
+
+        :param str path: the path of the page
+    """
+    cache_path = path + RENDER_CACHE_SUFFIX
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+
 
 class Page(object):
-    def __init__(self, path, url, new=False):
+    def __init__(self, path, url, new=False, meta_only=False):
         self.path = path
         self.url = url
         self._meta = OrderedDict()
-        # Generate the path to the history file for this page and create a new history object with it
-        history_path = path.replace("\\" + url + ".md", "/history/" + url + ".json")
-        self.history = History(history_path, url)
+        self._html = None
+        self._body = None
+        self._history = None
         if not new:
-            self.load()
-            self.render()
+            if meta_only:
+                self.load_meta()
+                self.render_meta()
+            else:
+                self.render()
 
     def __repr__(self):
         return "<Page: {}@{}>".format(self.url, self.path)
 
+    @property
+    def history(self):
+        # the history holds every version of the page, it is only loaded
+        # when it is used so listing pages doesn't have to read it
+        if self._history is None:
+            # Generate the path to the history file for this page and create a new history object with it
+            history_path = self.path.replace("\\" + self.url + ".md", "/history/" + self.url + ".json")
+            self._history = History(history_path, self.url)
+        return self._history
+
     def load(self):
-        with open(self.path, 'r', encoding='utf-8') as f:
-            self.content = f.read()
+        self.content = read_file(self.path)
+
+    def load_meta(self):
+        # preprocessors work on the whole page, so the content can
+        # only be cut short if there are none
+        if Processor.preprocessors:
+            self.load()
+        else:
+            self.content = read_header(self.path)
 
     def render(self):
-        processor = Processor(self.content)
-        self._html, self.body, self._meta = processor.process()
+        # the cache doesn't know about processors registered later on,
+        # so pages are only cached when the default ones are in use, and
+        # links are built for a request so only then can they be cached
+        if (Processor.preprocessors or Processor.postprocessors != [wikilink]
+                or not has_request_context()):
+            self._html, self.body, meta = Processor(read_file(self.path)).process()
+        else:
+            stat = os.stat(self.path)
+            self._html, self.body, meta = render_file(
+                self.path, stat.st_mtime_ns, stat.st_size, request.script_root)
+        # the rendering is shared through the cache, the page gets its
+        # own copy of the metadata as it may be modified
+        self._meta = OrderedDict(meta)
+
+    def render_meta(self):
+        processor = Processor(self.content, meta_only=True)
+        body, self._meta = processor.process_meta_only()
+        # without the full content the body is loaded on first access
+        if body:
+            self.body = body
 
     def save(self, user, update=True):
         folder = os.path.dirname(self.path)
         if not os.path.exists(folder):
             os.makedirs(folder)
 
+        body = self.body.replace('\r\n', '\n')
+        content = ''.join('%s: %s\n' % (key, value)
+                          for key, value in self._meta.items())
+        content += '\n' + body
         with open(self.path, 'w', encoding='utf-8') as f:
-            for key, value in list(self._meta.items()):
-                line = '%s: %s\n' % (key, value)
-                f.write(line)
-            f.write('\n')
-            f.write(self.body.replace('\r\n', '\n'))
+            f.write(content)
 
-        self.history.save(user, self.body.replace('\r\n', '\n'))
+        self.history.save(user, body)
 
         if update:
-            self.load()
-            self.render()
+            # the metadata and body in memory are what was just written,
+            # only the html is out of date and is rendered again on first
+            # access. Preprocessors may change the body and metadata of a
+            # rendered page, so with those the page is rendered right away
+            self.body = body
+            self._html = None
+            if Processor.preprocessors:
+                self.render()
 
     @property
     def meta(self):
@@ -297,8 +588,21 @@ class Page(object):
 
     @property
     def html(self):
+        # pages loaded with meta_only are rendered on first access
+        if self._html is None:
+            self.render()
         return self._html
 
+    @property
+    def body(self):
+        if self._body is None:
+            self.render()
+        return self._body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+
     def __html__(self):
         return self.html
 
@@ -360,9 +664,8 @@ class History(object):
         self.path = path
         if not os.path.exists(self.path):
             self.create()
-        with open(self.path, 'r') as hist:
-            self.entries = json.load(hist)
-            self.entryKeys = sorted(self.entries, reverse=True)
+        self.entries = json.loads(read_file(self.path))
+        self.entryKeys = sorted(self.entries, reverse=True)
 
     def create(self):
         """
@@ -379,15 +682,21 @@ class History(object):
         :param version: The timestamp of when this edit was made, denoting a new version
         :return:
         """
-        with open(self.path, 'w') as hist:
-            self.entries[datetime.datetime.now().timestamp()] = {
-                "user": user,
-                "formatted-date": str(datetime.datetime.now().strftime('%b %d, %Y at %I:%M:%S %p')),
-                "version": version
-            }
-            hist.seek(0)
-            json.dump(self.entries, hist, indent=4)
-            hist.truncate()
+        now = datetime.datetime.now()
+        # keys are stored as strings, the same as they are when loaded
+        self.entries[str(now.timestamp())] = {
+            "user": user,
+            "formatted-date": now.strftime('%b %d, %Y at %I:%M:%S %p'),
+            "version": version
+        }
+        # both writers produce the same file, so it doesn't change
+        # depending on whether orjson is installed
+        if orjson is not None:
+            with open(self.path, 'wb') as hist:
+                hist.write(orjson.dumps(self.entries, option=orjson.OPT_INDENT_2))
+        else:
+            with open(self.path, 'w', encoding='utf-8') as hist:
+                json.dump(self.entries, hist, indent=2, ensure_ascii=False)
 
 
 class Wiki(object):
@@ -440,6 +749,7 @@ class Wiki(object):
         if not os.path.exists(folder):
             os.makedirs(folder)
         os.rename(source, target)
+        remove_render_cache(source)
 
     def delete(self, url):
         path = self.path(url)
@@ -448,6 +758,7 @@ class Wiki(object):
             return False
         os.remove(page.history.path)
         os.remove(path)
+        remove_render_cache(path)
         return True
 
     def index(self):
@@ -457,20 +768,25 @@ class Wiki(object):
             :returns: a list of all the wiki pages
             :rtype: list
         """
-        # make sure we always have the absolute path for fixing the
-        # walk path
-        pages = []
+        files = []
+        stats = {}
+        for path, url, entry in self._walk():
+            stat = entry.stat()
+            files.append((path, url))
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+
+        # reuse the previous index as long as no page was added, removed
+        # or modified since it was built. preprocessors may change what
+        # a page holds, then the pages are always read again
         root = os.path.abspath(self.root)
-        for cur_dir, _, files in os.walk(root):
-            # get the url of the current directory
-            cur_dir_url = cur_dir[len(root) + 1:]
-            for cur_file in files:
-                path = os.path.join(cur_dir, cur_file)
-                if cur_file.endswith('.md'):
-                    url = clean_url(os.path.join(cur_dir_url, cur_file[:-3]))
-                    page = Page(path, url)
-                    pages.append(page)
-        return sorted(pages, key=lambda x: x.title.lower())
+        cached = _INDEX_CACHE.get(root)
+        if cached is not None and cached[0] == stats and not Processor.preprocessors:
+            return list(cached[1])
+
+        pages = [Page(path, url, meta_only=True) for path, url in files]
+        pages.sort(key=lambda x: x.title.lower())
+        _INDEX_CACHE[root] = (stats, pages)
+        return list(pages)
 
     def index_by(self, key):
         """
@@ -485,47 +801,88 @@ class Wiki(object):
                 a list of pages that share the given attribute.
             :rtype: dict
         """
-        pages = {}
+        pages = defaultdict(list)
         for page in self.index():
-            value = getattr(page, key)
-            pre = pages.get(value, [])
-            pages[value] = pre.append(page)
+            pages[getattr(page, key)].append(page)
         return pages
 
     def get_by_title(self, title):
-        pages = self.index(attr='title')
+        pages = self.index_by('title')
         return pages.get(title)
 
     def get_tags(self):
         pages = self.index()
         tags = {}
         for page in pages:
-            pagetags = page.tags.split(',')
-            for tag in pagetags:
-                tag = tag.strip()
-                if tag == '':
-                    continue
-                elif tags.get(tag):
-                    tags[tag].append(page)
-                else:
-                    tags[tag] = [page]
+            for tag in _TAG_SPLIT_RE.split(page.tags.strip()):
+                if tag:
+                    tags.setdefault(tag, []).append(page)
         return tags
 
     def index_by_tag(self, tag):
         pages = self.index()
+        # match whole entries of the comma separated list only, a plain
+        # substring check would also find "foo" in "foobar"
+        search = re.compile(
+            r'(?:^|,)\s*' + re.escape(tag) + r'\s*(?:,|$)').search
         tagged = []
         for page in pages:
-            if tag in page.tags:
+            if search(page.tags):
                 tagged.append(page)
         return sorted(tagged, key=lambda x: x.title.lower())
 
     def search(self, term, ignore_case=True, attrs=['title', 'tags', 'body']):
-        pages = self.index()
-        regex = re.compile(term, re.IGNORECASE if ignore_case else 0)
+        search = compile_search(term, ignore_case).search
         matched = []
-        for page in pages:
-            for attr in attrs:
-                if regex.search(getattr(page, attr)):
-                    matched.append(page)
-                    break
-        return matched
+        for path, url, _ in self._walk():
+            # preprocessors may change what a page holds, then only the
+            # processed page can be searched
+            if Processor.preprocessors:
+                page = Page(path, url, meta_only=True)
+                values = (getattr(page, attr) for attr in attrs)
+            else:
+                page = None
+                values = self._search_raw(path, url, attrs)
+            if any(search(value) for value in values):
+                matched.append(page or Page(path, url, meta_only=True))
+        return sorted(matched, key=lambda x: x.title.lower())
+
+    def _walk(self, root=None, root_url=''):
+        """
+            Walks the content directory and yields the path, url and
+            directory entry of every page found.
+        """
+        # make sure we always have the absolute path for fixing the
+        # walk path
+        if root is None:
+            root = os.path.abspath(self.root)
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk(
+                        entry.path, os.path.join(root_url, entry.name))
+                elif entry.name.endswith('.md'):
+                    url = clean_url(os.path.join(root_url, entry.name[:-3]))
+                    yield entry.path, url, entry
+
+    def _search_raw(self, path, url, attrs):
+        """
+            Yields the values of the given attributes of a page, taken
+            from its raw content so the page doesn't have to be built.
+            The body is the raw markdown following the meta block.
+        """
+        meta_raw, _, body = read_file(path).partition('\n\n')
+        meta = None
+        for attr in attrs:
+            if attr == 'body':
+                yield body
+            elif attr in ('title', 'tags'):
+                if meta is None:
+                    meta = parse_meta(meta_raw)
+                if attr in meta:
+                    yield '\n'.join(meta[attr])
+                else:
+                    # the defaults of the page properties
+                    yield url if attr == 'title' else ''
+            else:
+                yield getattr(Page(path, url, meta_only=True), attr)
@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
 from Riki import app
+from wiki.core import History
+from wiki.core import orjson
 
 
 class BasicTests(unittest.TestCase):
@@ -33,5 +39,45 @@ class BasicTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+class HistoryFileTests(unittest.TestCase):
+
+    ############################
+    #### setup and teardown ####
+    ############################
+
+    # executed prior to each test
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'page.json')
+
+    # executed after each test
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    ###############
+    #### tests ####
+    ###############
+
+    def test_save_and_reload(self):
+        History(self.path, 'page').save('Zoë', '1')
+        history = History(self.path, 'page')
+        self.assertEqual(len(history.entryKeys), 1)
+        entry = history.entries[history.entryKeys[0]]
+        self.assertEqual((entry['user'], entry['version']), ('Zoë', '1'))
+        # the file is written as readable utf-8 rather than escaped ascii
+        with open(self.path, encoding='utf-8') as f:
+            self.assertIn('"user": "Zoë"', f.read())
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_save_without_orjson(self):
+        # the json fallback writes the same file orjson does
+        with mock.patch('wiki.core.orjson', None):
+            History(self.path, 'page').save('Zoë', '1')
+        with open(self.path, 'rb') as f:
+            written = f.read()
+        entries = History(self.path, 'page').entries
+        self.assertEqual(written, orjson.dumps(entries, option=orjson.OPT_INDENT_2))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from wiki.core import Page
+from wiki.core import Processor
+from wiki.core import Wiki
+
+
+PAGES = {
+    'alpha': 'title: Alpha\ntags: one, two\n\nfirst\n',
+    'beta': 'title: Beta\ntags: two\n\nsecond\n',
+    'gamma': 'title: Alpha\ntags: three\n\nthird\n',
+    'delta': 'title: Delta\ntags: foobar, c++ \n\nfourth\n',
+    'epsilon': 'title: Epsilon\ntags:  foo ,bar\n\nfifth\n',
+}
+
+
+class IndexTests(unittest.TestCase):
+
+    ############################
+    #### setup and teardown ####
+    ############################
+
+    # executed prior to each test
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for url, content in PAGES.items():
+            with open(os.path.join(self.root, url + '.md'), 'w') as f:
+                f.write(content)
+        self.wiki = Wiki(self.root)
+
+    # executed after each test
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    ###############
+    #### tests ####
+    ###############
+
+    def test_index_by(self):
+        # every group holds the list of pages sharing the value
+        pages = self.wiki.index_by('title')
+        self.assertEqual(sorted(pages), ['Alpha', 'Beta', 'Delta', 'Epsilon'])
+        self.assertEqual(sorted(page.url for page in pages['Alpha']), ['alpha', 'gamma'])
+        self.assertEqual([page.url for page in pages['Beta']], ['beta'])
+
+    def test_get_by_title(self):
+        self.assertEqual([page.url for page in self.wiki.get_by_title('Beta')], ['beta'])
+        self.assertIsNone(self.wiki.get_by_title('Missing'))
+
+    def test_index_by_tag(self):
+        # only whole tags match, "foo" must not find the page tagged "foobar"
+        self.assertEqual([page.url for page in self.wiki.index_by_tag('foo')], ['epsilon'])
+        self.assertEqual([page.url for page in self.wiki.index_by_tag('two')], ['alpha', 'beta'])
+        self.assertEqual([page.url for page in self.wiki.index_by_tag('c++')], ['delta'])
+        self.assertEqual(self.wiki.index_by_tag('o'), [])
+
+    def test_index_is_shared(self):
+        # every request sets up its own wiki, the index is kept between them
+        pages = self.wiki.index()
+        self.assertEqual([page.url for page in Wiki(self.root).index()], [page.url for page in pages])
+        self.assertIs(Wiki(self.root).index()[0], pages[0])
+
+    def test_index_after_edit(self):
+        self.wiki.index()
+        with open(os.path.join(self.root, 'beta.md'), 'w') as f:
+            f.write('title: Aardvark\ntags: two\n\nsecond\n')
+        pages = Wiki(self.root).index()
+        self.assertEqual((pages[0].url, pages[0].title), ('beta', 'Aardvark'))
+
+    def test_get_tags(self):
+        tags = self.wiki.get_tags()
+        self.assertEqual(sorted(tags), ['bar', 'c++', 'foo', 'foobar', 'one', 'three', 'two'])
+        self.assertEqual(sorted(page.url for page in tags['two']), ['alpha', 'beta'])
+
+
+SEARCH_PAGES = {
+    'title': 'title: Needle Title\ntags: plain\n\nnothing here\n',
+    'tags': 'title: Tagged\ntags: needle, other\n\nnothing here\n',
+    'body': 'title: Body\ntags: plain\n\nthe needle is here\n',
+    'upper': 'title: Upper\n\nthe NEEDLE in caps\n',
+    'yaml': '---\ntitle: Yaml\ntags: fenced\n---\n\na needle below a fence\n',
+    'metaonly': 'title: Meta Only needle\ntags: plain',
+    'nometa': 'a needle with no meta block\nand no blank line\n',
+    'haystack': 'title: Haystack\n\nonly hay in here\n',
+}
+
+
+class SearchTests(unittest.TestCase):
+
+    ############################
+    #### setup and teardown ####
+    ############################
+
+    # executed prior to each test
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for url, content in SEARCH_PAGES.items():
+            with open(os.path.join(self.root, url + '.md'), 'w') as f:
+                f.write(content)
+        self.wiki = Wiki(self.root)
+
+    # executed after each test
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    ###############
+    #### tests ####
+    ###############
+
+    def assertSearch(self, term, ignore_case=True):
+        # the search has to find the same pages as searching the
+        # attributes of the fully rendered pages does
+        flags = re.IGNORECASE if ignore_case else 0
+        expected = []
+        for url in SEARCH_PAGES:
+            page = Page(os.path.join(self.root, url + '.md'), url)
+            if any(re.search(term, getattr(page, attr), flags) for attr in ('title', 'tags', 'body')):
+                expected.append(url)
+        found = [page.url for page in self.wiki.search(term, ignore_case)]
+        self.assertEqual(sorted(found), sorted(expected))
+        return sorted(found)
+
+    def test_title_only(self):
+        self.assertEqual(self.assertSearch('Title'), ['title'])
+
+    def test_tags_only(self):
+        self.assertEqual(self.assertSearch('other'), ['tags'])
+
+    def test_body_only(self):
+        self.assertEqual(self.assertSearch('is here'), ['body'])
+
+    def test_case_sensitive(self):
+        self.assertEqual(self.assertSearch('NEEDLE', ignore_case=False), ['upper'])
+        self.assertNotIn('upper', self.assertSearch('needle', ignore_case=False))
+
+    def test_yaml_header(self):
+        self.assertEqual(self.assertSearch('fence'), ['yaml'])
+
+    def test_no_blank_line(self):
+        self.assertEqual(self.assertSearch('Meta Only'), ['metaonly'])
+        # without a blank line there is no body, the title is the url
+        self.assertEqual(self.assertSearch('no meta block'), [])
+        self.assertEqual(self.assertSearch('nometa'), ['nometa'])
+
+    def test_all(self):
+        self.assertSearch('needle')
+
+    def test_preprocessors(self):
+        def preprocessor(text):
+            return text.replace('hay', 'needle')
+        Processor.preprocessors.append(preprocessor)
+        try:
+            self.assertIn('haystack', self.assertSearch('needle'))
+        finally:
+            Processor.preprocessors.remove(preprocessor)
+
+
+if __name__ == "__main__":
+    unittest.main()
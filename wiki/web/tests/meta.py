@@ -0,0 +1,89 @@
+import glob
+import os
+import unittest
+
+import markdown
+
+from Riki import app
+from wiki.core import parse_meta
+from wiki.core import Processor
+from wiki.core import read_file
+
+
+PAGES = [
+    'title: Plain\ntags: one, two\n\nbody\n',
+    'title: Continued\ntags: one,\n    two\n\nbody\n',
+    'title: WS\n    \nbody\n\nmore body\n',
+    '---\ntitle: Yaml Page\ntags: yaml\n---\n\nbody\n',
+    '---\ntitle: Yaml Dots\n...\ntags: not meta\n\nbody\n',
+    'title: Rated\ntotal: 10\ntimesrated: 1\nrating: 4\n\nbody\n',
+    'Title: Upper\n\tTags: tabbed\n\nbody\n',
+    'title: Words\nTotal: lots of things\nrating: 3\n\nbody\n',
+]
+
+
+class MetaTests(unittest.TestCase):
+
+    ############################
+    #### setup and teardown ####
+    ############################
+
+    # executed prior to each test
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.context = app.test_request_context()
+        self.context.push()
+
+    # executed after each test
+    def tearDown(self):
+        self.context.pop()
+
+    ###############
+    #### tests ####
+    ###############
+
+    def assertSameMeta(self, text):
+        # the index parses the meta block by hand, it has to give the
+        # same result as the markdown meta extension used when rendering
+        md = markdown.Markdown(extensions=['meta'])
+        md.convert(text)
+        self.assertEqual(parse_meta(text.split('\n\n', 1)[0]), md.Meta)
+
+        full = Processor(text)
+        full.process()
+        meta_only = Processor(text, meta_only=True)
+        meta_only.process_meta_only()
+        self.assertEqual(meta_only.meta, full.meta)
+
+    def test_meta_matches_render(self):
+        for text in PAGES:
+            with self.subTest(text=text):
+                self.assertSameMeta(text)
+
+    def test_meta_matches_render_for_content(self):
+        content = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'content')
+        for path in glob.glob(os.path.join(content, '*.md')):
+            with self.subTest(path=path):
+                self.assertSameMeta(read_file(path))
+
+    def test_yaml_header(self):
+        meta = parse_meta('---\ntitle: Yaml Page\ntags: yaml\n---')
+        self.assertEqual(meta, {'title': ['Yaml Page'], 'tags': ['yaml']})
+
+    def test_whitespace_line_ends_meta(self):
+        self.assertEqual(parse_meta('title: WS\n    '), {'title': ['WS']})
+
+    def test_rating(self):
+        # every render counts one more rating and keeps the average whole
+        meta = Processor('title: Rated\ntotal: 10\ntimesrated: 1\nrating: 4\n\nbody\n').process()[2]
+        self.assertEqual((meta['total'], meta['timesrated'], meta['rating']), ('14', '2', '7'))
+
+    def test_rating_entries_that_are_not_numbers(self):
+        # entries that don't hold a number are kept instead of failing the render
+        meta = Processor('title: Words\nTotal: lots of things\nrating: 3\n\nbody\n').process()[2]
+        self.assertEqual(meta['total'], 'lots of things')
+        self.assertEqual(meta['rating'], '3')
+
+
+if __name__ == "__main__":
+    unittest.main()
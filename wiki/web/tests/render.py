@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from Riki import app
+from wiki.core import Page
+from wiki.core import Processor
+from wiki.core import RENDER_CACHE_SUFFIX
+from wiki.core import render_file
+
+
+class RenderCacheTests(unittest.TestCase):
+
+    ############################
+    #### setup and teardown ####
+    ############################
+
+    # executed prior to each test
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.context = app.test_request_context()
+        self.context.push()
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, 'page.md')
+        self.write('title: Page\n\nold content [[Other]]\n')
+
+    # executed after each test
+    def tearDown(self):
+        shutil.rmtree(self.root)
+        self.context.pop()
+
+    def write(self, content, mtime_ns=None):
+        with open(self.path, 'w') as f:
+            f.write(content)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def write_cache(self, key):
+        with open(self.path + RENDER_CACHE_SUFFIX, 'w') as f:
+            json.dump({'key': key, 'html': '<p>stale</p>', 'body': 'stale', 'meta': []}, f)
+
+    ###############
+    #### tests ####
+    ###############
+
+    def test_cache_is_written(self):
+        self.assertIn('old content', Page(self.path, 'page').html)
+        self.assertEqual(sorted(os.listdir(self.root)), ['page.md', 'page.md' + RENDER_CACHE_SUFFIX])
+
+    def test_cache_is_read(self):
+        Page(self.path, 'page')
+        with open(self.path + RENDER_CACHE_SUFFIX) as f:
+            key = json.load(f)['key']
+        self.write_cache(key)
+        # the in memory cache would answer first
+        render_file.cache_clear()
+        self.assertEqual(Page(self.path, 'page').html, '<p>stale</p>')
+
+    def test_same_mtime_new_content(self):
+        # content restored with its timestamp preserved still invalidates the cache
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self.assertIn('old content', Page(self.path, 'page').html)
+        self.write('title: Page\n\nthe new content\n', mtime_ns)
+        self.assertIn('the new content', Page(self.path, 'page').html)
+
+    def test_cache_from_other_version_is_ignored(self):
+        stat = os.stat(self.path)
+        self.write_cache([0, stat.st_mtime_ns, stat.st_size, ''])
+        self.assertIn('old content', Page(self.path, 'page').html)
+
+    def test_links_follow_the_script_root(self):
+        self.assertIn("href='/other/'", Page(self.path, 'page').html)
+        # a wiki served from elsewhere links its pages there
+        self.context.pop()
+        self.context = app.test_request_context(base_url='http://localhost/wiki/')
+        self.context.push()
+        self.assertIn("href='/wiki/other/'", Page(self.path, 'page').html)
+
+    def test_processors_bypass_the_cache(self):
+        self.assertIn('old content', Page(self.path, 'page').html)
+        Processor.postprocessors.append(str.upper)
+        try:
+            self.assertIn('OLD CONTENT', Page(self.path, 'page').html)
+        finally:
+            Processor.postprocessors.remove(str.upper)
+        self.assertIn('old content', Page(self.path, 'page').html)
+
+
+if __name__ == "__main__":
+    unittest.main()